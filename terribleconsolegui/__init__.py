@@ -2,7 +2,3 @@ __all__ = ['common', 'guielements', 'layouts']
 from .common import *
 from .guielements import *
 from .layouts import *
-
-import colorama
-
-colorama.init()
@@ -1,9 +1,132 @@
+import atexit
+import ctypes
+import sys
+from functools import lru_cache
+
+import colorama
 from colorama import Fore, Back
+from colorama.ansitowin32 import StreamWrapper
+
+
+def _enable_vt_processing() -> bool:
+    """Try to make the Windows console handle ANSI escape codes itself.
+    
+    Returns whether it worked, which is only ever the case on Windows 10
+    and later when stdout is a console.
+    """
+    try:
+        kernel32 = ctypes.WinDLL('kernel32')
+    except (AttributeError, OSError):
+        return False
+    kernel32.GetStdHandle.restype = ctypes.c_void_p
+    handle = ctypes.c_void_p(kernel32.GetStdHandle(-11))  # STD_OUTPUT_HANDLE
+    mode = ctypes.c_uint32()
+    if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+        return False
+    # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+    return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+
+
+# colorama only has to wrap stdout (and parse everything written to it)
+# when the console can't handle the escape codes itself.
+colorama.init(wrap=not _enable_vt_processing())
+
+
+def _sgr_params(code: str) -> bytes:
+    """Get the parameters of an SGR escape code (`'\\033[31m'` -> `b'31'`)."""
+    return code[2:-1].encode('ascii')
+
+
+def _encoding() -> str:
+    """The encoding of whatever `sys.stdout` currently is."""
+    return getattr(sys.stdout, 'encoding', None) or 'utf-8'
+
+
+# Parsed once so drawing doesn't have to pick the escape codes apart.
+_FG_CODE = {code: _sgr_params(code) for code in vars(Fore).values()}
+_BG_CODE = {code: _sgr_params(code) for code in vars(Back).values()}
+
+# Everything drawn since the last `flush_frame` call, already encoded.
+_frame_buf = bytearray()
+
+
+@lru_cache(maxsize=None)
+def _blanks(length: int) -> str:
+    """Get a string of `length` spaces, made once per length."""
+    return ' ' * length
+
+
+def _cursor(x: int, y: int) -> bytes:
+    """The escape code that moves the cursor to `x` and `y`."""
+    return b'\033[%d;%dH' % (y, x)
+
+
+def _sgr(fore: str, back: str) -> bytes:
+    """Combine two colors into a single SGR escape code.
+    
+    Default colors are left out, the console is always reset after
+    drawing so they're already in effect. If both colors are the
+    defaults, this is empty.
+    """
+    params = []
+    if fore != Fore.RESET:
+        params.append(_FG_CODE.get(fore) or _sgr_params(fore))
+    if back != Back.RESET:
+        params.append(_BG_CODE.get(back) or _sgr_params(back))
+    if not params:
+        return b''
+    return b'\033[%bm' % b';'.join(params)
+
+
+@lru_cache(maxsize=4096)
+def _render(text: str, x: int, y: int, fore: str, back: str, encoding: str) -> bytes:
+    """Render the escape codes and text `print_pos` writes."""
+    pos = _cursor(x, y)
+    text = text.encode(encoding, 'replace')
+    sgr = _sgr(fore, back)
+    if not sgr:
+        return pos + text
+    return b'%b%b%b\033[0m' % (pos, sgr, text)
 
 
 def print_pos(text: str, x: int, y: int, fore=Fore.RESET, back=Back.RESET):
-    """Print a colored string at a specific x and y of the console."""
-    if fore == Fore.RESET and back == Back.RESET:
-        print(f'\033[{y};{x}H', end=str(text))
+    """Print a colored string at a specific x and y of the console.
+    
+    The non-default colors are combined into a single SGR escape code
+    and the text is followed by a single reset, so the console is always
+    left with the default colors.
+    
+    Nothing is written to the console until `flush_frame` is called.
+    `Layout.run_loop` and `Layout.clear` flush on their own, and
+    anything still buffered is flushed when the program exits. Call
+    `flush_frame` after drawing outside of a layout if it has to be
+    seen straight away (e.g. before waiting for input).
+    
+    Raises:
+        TypeError: If `text` isn't a string.
+    """
+    if not isinstance(text, str):
+        raise TypeError(f'`text` must be a str, not {type(text).__name__}')
+    _frame_buf.extend(_render(text, x, y, fore, back, _encoding()))
+
+
+def flush_frame():
+    """Write everything printed with `print_pos` to the console at once."""
+    if not _frame_buf:
+        return
+    stream = sys.stdout
+    if isinstance(stream, StreamWrapper) or not hasattr(stream, 'buffer'):
+        # colorama has to see the escape codes to turn them into win32
+        # calls, so it gets text instead of the raw bytes.
+        stream.write(_frame_buf.decode(_encoding()))
+        stream.flush()
     else:
-        print(f'\033[{y};{x}H', end=''.join((fore, back, str(text), Fore.RESET, Back.RESET)))
+        stream.flush()
+        stream.buffer.write(_frame_buf)
+        stream.buffer.flush()
+    _frame_buf.clear()
+
+
+# Don't lose whatever was drawn last if nothing flushed it. Registered
+# after `colorama.init`, so it runs before colorama resets the colors.
+atexit.register(flush_frame)
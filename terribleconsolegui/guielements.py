@@ -1,7 +1,7 @@
 from math import inf
 from colorama import Fore, Back
 
-from .common import print_pos
+from .common import _blanks, _cursor, _encoding, _frame_buf, _sgr
 
 
 class PopGUISection(Exception):
@@ -14,6 +14,44 @@ class PopGUISection(Exception):
     pass
 
 
+class _ExclusiveGroup:
+    """A group of mutually exclusive gui elements.
+    
+    Only keeps track of which element in the group is selected, so
+    selecting a different one only has to deselect that one element.
+    
+    Attributes:
+        current(GUIElement): The selected element of this group, or
+            None if none of them are selected.
+    """
+    
+    def __init__(self, current=None):
+        self.current = current
+
+
+class _RefreshingAttribute:
+    """An attribute of a gui element that some cached values are made from.
+    
+    Setting it calls the element's `refresh` method, so the cached
+    values (e.g. escape codes or formatted text) are recomputed.
+    """
+    
+    def __init__(self, refresh):
+        self.refresh = refresh
+    
+    def __set_name__(self, owner, name):
+        self.name = '_' + name
+    
+    def __get__(self, element, owner=None):
+        if element is None:
+            return self
+        return getattr(element, self.name)
+    
+    def __set__(self, element, value):
+        setattr(element, self.name, value)
+        getattr(element, self.refresh)()
+
+
 class GUIElement:
     """The base GUI element. All other GUI elements inherit from this.
     
@@ -45,24 +83,49 @@ class GUIElement:
         unsel_fore(str): The color of the foreground when unselected.
         unsel_back(str): The color of the background when unselected.
         selected(bool): Whether or not this element is selected.
-        exclusive_to(list): A list of other gui elements that are
-            mutually exclusive to this element. If this element is
-            selected is selected, all the elements in this list will be
-            deselected. If the list contains this element, it will be
-            skipped.
+        exclusive_to(_ExclusiveGroup): The group of gui elements this
+            element is mutually exclusive to, or None. If this element
+            is selected, the currently selected element of the group
+            will be deselected.
     """
     
     def __init__(self, text, x, y, sel_fore=Fore.RESET, sel_back=Back.GREEN,
                  unsel_fore=Fore.RESET, unsel_back=Back.RESET, selected=False):
         self.text = text
-        self.x = x
-        self.y = y
+        self._x = x
+        self._y = y
         self.selected = selected
-        self.sel_fore = sel_fore
-        self.sel_back = sel_back
-        self.unsel_fore = unsel_fore
-        self.unsel_back = unsel_back
-        self.exclusive_to = []
+        self._sel_fore = sel_fore
+        self._sel_back = sel_back
+        self._unsel_fore = unsel_fore
+        self._unsel_back = unsel_back
+        self.exclusive_to = None
+        self._refresh_escapes()
+    
+    x = _RefreshingAttribute('_refresh_escapes')
+    y = _RefreshingAttribute('_refresh_escapes')
+    sel_fore = _RefreshingAttribute('_refresh_escapes')
+    sel_back = _RefreshingAttribute('_refresh_escapes')
+    unsel_fore = _RefreshingAttribute('_refresh_escapes')
+    unsel_back = _RefreshingAttribute('_refresh_escapes')
+    
+    def _refresh_escapes(self):
+        """Precompute the cursor position and color escape codes."""
+        self._pos_esc = _cursor(self._x, self._y)
+        # Indexed by `selected`.
+        self._prefixes = (_sgr(self._unsel_fore, self._unsel_back),
+                          _sgr(self._sel_fore, self._sel_back))
+        self._last_render = None
+    
+    @property
+    def text(self):
+        """The text to display."""
+        return self._text
+    
+    @text.setter
+    def text(self, text):
+        self._text = text
+        self._text_str = str(text)
     
     def set_color(self, sel_fore=None, sel_back=None, unsel_fore=None, unsel_back=None):
         """Change the selected/unselected foreground/background color.
@@ -86,30 +149,72 @@ class GUIElement:
     def update(self, text: str=None):
         """Update the text and color of the gui element.
         
+        Nothing is drawn if the text and selection are the same as the
+        last time it drew. Use `redraw` instead if something else (e.g.
+        `print_pos`) may have drawn over this element.
+        
         Args:
             text(str, optional): If passed, set the text to this before
                 updating.
         """
         if text is None:
-            text = self.text
-        fore = self.sel_fore if self.selected else self.unsel_fore
-        back = self.sel_back if self.selected else self.unsel_back
-        print_pos(text, self.x, self.y, fore, back)
+            text = self._text_str
+        selected = bool(self.selected)
+        render = (text, selected)
+        if render == self._last_render:
+            return
+        self._last_render = render
+        self._draw(text, self._prefixes[selected])
+    
+    def _draw(self, text: str, prefix: bytes):
+        """Draw text at this element's position with a color prefix.
+        
+        Works like `print_pos`, but with this element's precomputed
+        escape codes.
+        """
+        text = text.encode(_encoding(), 'replace')
+        if prefix:
+            _frame_buf.extend(b'%b%b%b\033[0m' % (self._pos_esc, prefix, text))
+        else:
+            _frame_buf.extend(self._pos_esc + text)
+    
+    def redraw(self):
+        """Draw this gui element even if it looks like nothing changed.
+        
+        `update` skips drawing when the text and colors are the same as
+        the last time it drew, this should be used when something else
+        may have drawn over this element.
+        """
+        self._last_render = None
+        self.update()
     
     def select(self):
         """Select this gui element.
         
-        Change the colors to the selected colors. Any gui elements in
-        this objects `exclusive_to` attribute will be deselected.
+        Change the colors to the selected colors. The selected element
+        of this objects `exclusive_to` group will be deselected. Does
+        nothing if this element is already selected.
         """
-        for element in self.exclusive_to:
-            if element.selected and element is not self:
-                element.deselect()
+        group = self.exclusive_to
+        if self.selected and (group is None or group.current is self):
+            return
+        if group is not None:
+            if group.current is not None and group.current is not self:
+                group.current.deselect()
+            group.current = self
         self.selected = True
         self.update()
     
     def deselect(self):
-        """Deselected this element."""
+        """Deselected this element.
+        
+        Does nothing if this element isn't selected.
+        """
+        if not self.selected:
+            return
+        group = self.exclusive_to
+        if group is not None and group.current is self:
+            group.current = None
         self.selected = False
         self.update()
     
@@ -128,8 +233,9 @@ class GUIElement:
         """
         self.deselect()
         if length is None:
-            length = len(str(self.text))
-        print_pos(' ' * length, self.x, self.y, Fore.RESET, Back.RESET)
+            length = len(self._text_str)
+        self._draw(_blanks(length), b'')
+        self._last_render = None
         self.cleanup()
     
     def cleanup(self):
@@ -150,20 +256,60 @@ class GUICounter(GUIElement):
         super().__init__(default, x, y, Fore.RESET, Back.GREEN, Fore.RESET, Back.RESET)
         self.count = default
         self.aux_count = default_aux
-        self.align = align
-        self.padding = padding
-        self.bounds = bounds
+        self._align = align
+        self._padding = padding
+        self._bounds = bounds
         self.aux_bounds = aux_bounds
         self.wrap_bounds = wrap_bounds
+        self._refresh_str_cache()
     
-    def update(self):
+    align = _RefreshingAttribute('_refresh_str_cache')
+    padding = _RefreshingAttribute('_refresh_str_cache')
+    bounds = _RefreshingAttribute('_refresh_str_cache')
+    
+    def _refresh_str_cache(self):
+        """Preformat small integer ranges so updating is an index."""
+        self._str_cache = None
+        self._str_offset = 0
+        self._count_str = None
+        low, high = self._bounds
+        if (isinstance(low, int) and isinstance(high, int) and high - low <= 10_000
+                and self._align in ('left', 'right')):
+            self._str_cache = [self._format(i) for i in range(low, high + 1)]
+            self._str_offset = low
+    
+    def _format(self, count):
+        """Format a count according to `align` and `padding`."""
         if self.align == 'left':
-            super().update(f'{self.count}')
+            return f'{count}'
         elif self.align == 'right':
-            super().update(str(self.count).zfill(self.padding))
+            return str(count).zfill(self.padding)
         else:
             raise ValueError("`GUICounter.align` must be either 'left' or 'right'")
     
+    @property
+    def count(self):
+        """The current count."""
+        return self._count
+    
+    @count.setter
+    def count(self, count):
+        self._count = count
+        self._count_str = None
+    
+    def _count_text(self):
+        """The count as it's displayed, only formatted after it changes."""
+        if self._count_str is None:
+            index = self._count - self._str_offset
+            if self._str_cache is not None and 0 <= index < len(self._str_cache):
+                self._count_str = self._str_cache[index]
+            else:
+                self._count_str = self._format(self._count)
+        return self._count_str
+    
+    def update(self):
+        super().update(self._count_text())
+    
     def clear(self, length=0):
         """Clear the displayed text and coloring.
         
@@ -177,57 +323,67 @@ class GUICounter(GUIElement):
             overwritten if it is larger than the length of current text,
             otherwise the length of the current text will be
             overwritten."""
-        super().clear(max((length, len(str(self.text)), self.padding)))
+        super().clear(max((length, len(self._count_text()), self.padding)))
     
     def increase(self):
         """Increase the counter."""
+        old_count = self.count
         if not self.count == self.bounds[1]:
             self.count += 1
         elif self.wrap_bounds:
             self.count = self.bounds[0]
-        self.update()
+        if self.count != old_count:
+            self.update()
     
     def decrease(self):
         """Decrease the counter."""
+        old_count = self.count
         if not self.count == self.bounds[0]:
             self.count -= 1
         elif self.wrap_bounds:
             self.count = self.bounds[1]
-        self.update()
+        if self.count != old_count:
+            self.update()
     
     def aux_increase(self):
         """Increase the auxiliary counter."""
+        old_count = self.count
         if not self.count == self.aux_bounds[1]:
             self.aux_count += 1
         elif self.wrap_bounds:
             self.count = self.aux_bounds[0]
-        self.update()
+        if self.count != old_count:
+            self.update()
     
     def aux_decrease(self):
         """Decrease the auxiliary counter."""
+        old_count = self.count
         if not self.count == self.aux_bounds[0]:
             self.aux_count -= 1
         elif self.wrap_bounds:
             self.count = self.aux_bounds[1]
-        self.update()
+        if self.count != old_count:
+            self.update()
 
 
 class GUIHiddenList(GUICounter):
     def __init__(self, items, x, y, sel_fore=Fore.RESET, sel_back=Back.GREEN,
                  unsel_fore=Fore.RESET, unsel_back=Back.RESET,
                  selected=False, max_width=None, wrap=False):
-        super().__init__(items[0], x, y, Fore.RESET, Back.GREEN, Fore.RESET, Back.RESET)
+        # Set before `GUICounter.__init__` sets the count, which needs them.
         self.items = items
+        self._n = len(items)
+        super().__init__(x, y, Fore.RESET, Back.GREEN, Fore.RESET, Back.RESET)
         self.wrap = wrap
         if max_width is None:
             self.max_width = max(len(i) for i in self.items)
         else:
             self.max_width = max_width
     
-    @property
-    def current(self):
-        """The currently displayed item."""
-        return self.items[self.count % len(self.items)]
+    @GUICounter.count.setter
+    def count(self, count):
+        GUICounter.count.fset(self, count)
+        self.current = self.items[count % self._n]  # The currently displayed item.
     
     def update(self):
         """Update the displayed text to the currently selected item."""
@@ -243,12 +399,14 @@ class GUIHiddenList(GUICounter):
         If the index is already at the last item and wrap isn't on,
         don't increase the index, otherwise do.
         """
-        if self.count == len(self.items) - 1:
+        old_count = self.count
+        if self.count == self._n - 1:
             if self.wrap:
                 self.count += 1
         else:
             self.count += 1
-        self.update()
+        if self.count != old_count:
+            self.update()
     
     def decrease(self):
         """Decrease the current item index then update the text.
@@ -256,9 +414,11 @@ class GUIHiddenList(GUICounter):
         If the index is already at the first item and wrap isn't on,
         don't decrease the index, otherwise do.
         """
+        old_count = self.count
         if self.count == 0:
             if self.wrap:
                 self.count -= 1
         else:
             self.count -= 1
-        self.update()
+        if self.count != old_count:
+            self.update()
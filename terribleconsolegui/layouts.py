@@ -1,4 +1,9 @@
-from .guielements import GUIElement
+import ctypes
+from collections import deque
+from itertools import repeat
+
+from .common import flush_frame
+from .guielements import GUIElement, _ExclusiveGroup
 try:
     from msvcrt import getch
 except ImportError:
@@ -53,6 +58,161 @@ _keys = {
 _keys.update({bytes((i,)): chr(i) for i in range(32, 127)})
 # _keys.update({bytes((i,)): f'^{chr(i + 65)}' for i in range(0, 26)})  # ctrl+char
 
+# `_keys` split up by prefix byte and indexed by the key's last byte, so
+# decoding a key press is a list index instead of building a new bytes
+# object to hash. Unknown keys are `None`.
+_single_keys = [None] * 256
+_nul_keys = [None] * 256
+_e0_keys = [None] * 256
+for _code, _name in _keys.items():
+    if len(_code) == 1:
+        _single_keys[_code[0]] = _name
+    elif _code[0] == 0x00:
+        _nul_keys[_code[1]] = _name
+    else:
+        _e0_keys[_code[1]] = _name
+del _code, _name
+
+# Key presses read straight from the Windows console come as virtual-key
+# codes. These are looked up by `code | enhanced << 8 | ctrl << 9`, where
+# `enhanced` is set for the dedicated arrow/navigation keys and not for
+# the same keys on the number pad.
+_vk_keys = [None] * 1024
+for _code, _names in {
+    0x21: ('num9', 'pgup', '^num9', '^pgup'),
+    0x22: ('num3', 'pgdn', '^num3', None),
+    0x23: ('num1', 'end', '^num1', '^end'),
+    0x24: ('num7', 'home', '^num7', '^home'),
+    0x25: ('num4', 'left', '^num4', None),
+    0x26: ('num8', 'up', '^num8', None),
+    0x27: ('num6', 'right', '^num6', None),
+    0x28: ('num2', 'down', '^num2', None),
+    0x2d: ('num0', None, '^num0', None),
+    0x2e: ('num.', 'del', '^num.', '^del'),
+    0x6f: (None, None, None, '^num/'),
+}.items():
+    for _modifiers, _name in enumerate(_names):
+        _vk_keys[_code | _modifiers << 8] = _name
+del _code, _names, _modifiers, _name
+
+
+class _KEY_EVENT_RECORD(ctypes.Structure):
+    _fields_ = [
+        ('bKeyDown', ctypes.c_int32),
+        ('wRepeatCount', ctypes.c_uint16),
+        ('wVirtualKeyCode', ctypes.c_uint16),
+        ('wVirtualScanCode', ctypes.c_uint16),
+        ('UnicodeChar', ctypes.c_uint16),
+        ('dwControlKeyState', ctypes.c_uint32),
+    ]
+
+
+class _INPUT_RECORD(ctypes.Structure):
+    # The other event types in the record's union are never read and
+    # aren't any bigger than a key event.
+    _fields_ = [
+        ('EventType', ctypes.c_uint16),
+        ('KeyEvent', _KEY_EVENT_RECORD),
+    ]
+
+
+# Key presses already read from the console but not handled yet, kept
+# across `_key_presses` calls so type-ahead reaches the next layout.
+_pending_keys = deque()
+
+# Marks keys with nothing mapped to them in `Layout.keys`.
+_unmapped = object()
+
+_STD_INPUT_HANDLE = -10
+_KEY_EVENT = 0x0001
+_CTRL_PRESSED = 0x0004 | 0x0008  # right ctrl | left ctrl
+_ENHANCED_KEY = 0x0100
+
+try:
+    _kernel32 = ctypes.WinDLL('kernel32')
+except (AttributeError, OSError):
+    _kernel32 = None
+else:
+    _kernel32.GetStdHandle.argtypes = (ctypes.c_uint32,)
+    _kernel32.GetStdHandle.restype = ctypes.c_void_p
+    _kernel32.GetConsoleMode.argtypes = (ctypes.c_void_p, ctypes.POINTER(ctypes.c_uint32))
+    _kernel32.ReadConsoleInputW.argtypes = (ctypes.c_void_p, ctypes.POINTER(_INPUT_RECORD),
+                                            ctypes.c_uint32, ctypes.POINTER(ctypes.c_uint32))
+
+
+def _console_key_presses(handle):
+    """Yield key presses read from the Windows console in batches.
+    
+    A whole batch of waiting input events (e.g. from a held down key) is
+    read at once with `ReadConsoleInputW`. Keys from the batch that
+    aren't consumed before the generator is closed stay in
+    `_pending_keys`.
+    """
+    records = (_INPUT_RECORD * 16)()
+    count = ctypes.c_uint32()
+    count_ref = ctypes.byref(count)
+    # Globals used for every key press, looked up once.
+    read_input = _kernel32.ReadConsoleInputW
+    flush = flush_frame
+    single_keys = _single_keys
+    vk_keys = _vk_keys
+    pending = _pending_keys
+    while True:
+        while pending:
+            yield pending.popleft()
+        flush()
+        if not read_input(handle, records, 16, count_ref):
+            raise ctypes.WinError()
+        for record in records[:count.value]:
+            event = record.KeyEvent
+            if record.EventType != _KEY_EVENT or not event.bKeyDown:
+                continue
+            char = event.UnicodeChar
+            if char:
+                key = single_keys[char] if char < 256 else None
+            else:
+                state = event.dwControlKeyState
+                key = vk_keys[event.wVirtualKeyCode | state & _ENHANCED_KEY
+                              | bool(state & _CTRL_PRESSED) << 9]
+            if key is not None:
+                pending.extend(repeat(key, event.wRepeatCount))
+
+
+def _getch_key_presses():
+    """Yield key presses read one at a time with `getch`."""
+    # Globals used for every key press, looked up once.
+    read = getch
+    flush = flush_frame
+    single_keys = _single_keys
+    nul_keys = _nul_keys
+    e0_keys = _e0_keys
+    while _pending_keys:
+        yield _pending_keys.popleft()
+    while True:
+        flush()
+        byte = read()[0]
+        if byte == 0x00:
+            key = nul_keys[read()[0]]
+        elif byte == 0xe0:
+            key = e0_keys[read()[0]]
+        else:
+            key = single_keys[byte]
+        if key is not None:
+            yield key
+
+
+def _key_presses():
+    """Yield the name of every key pressed.
+    
+    Everything printed with `print_pos` is flushed before waiting for
+    more key presses.
+    """
+    if _kernel32 is not None:
+        handle = _kernel32.GetStdHandle(_STD_INPUT_HANDLE)
+        if _kernel32.GetConsoleMode(handle, ctypes.byref(ctypes.c_uint32())):
+            return _console_key_presses(handle)
+    return _getch_key_presses()
+
 
 # class _keyDecorator:
 #     def __init__(self, layout):
@@ -79,8 +239,16 @@ class Layout:
         self.clear_on_exit = clear_on_exit
         # self.key = _keyDecorator(self)
         if exclusive:
+            group = _ExclusiveGroup()
             for element in self.elements:
-                element.exclusive_to = args
+                element.exclusive_to = group
+                if element.selected:
+                    if group.current is None:
+                        group.current = element
+                    else:
+                        # Only the first selected element stays selected. Nothing
+                        # is drawn yet, `run_loop` draws every element anyway.
+                        element.selected = False
     
     def __repr__(self):
         return 'Layout(current={current!r}, wrap={wrap!r}, [{elements}])'.format(
@@ -159,6 +327,7 @@ class Layout:
         for element in self.elements:
             element.clear()
         self.cleanup()
+        flush_frame()
     
     def deselect_all(self):
         """Deselect every element."""
@@ -171,38 +340,31 @@ class Layout:
     
     def previous(self):
         """Select the item to the left of the current item."""
-        self._current_index = (self._current_index - 1) % len(self.elements)
+        index = self._current_index - 1
+        self._current_index = index + len(self.elements) if index < 0 else index
         self.current.select()
     
     def next(self):
         """Select the item to the left of the current item."""
-        self._current_index = (self._current_index + 1) % len(self.elements)
+        index = self._current_index + 1
+        self._current_index = 0 if index >= len(self.elements) else index
         self.current.select()
     
     def run_loop(self, clear_on_exit=False):
         self.init()
-        self.current.select()
         for element in self.elements:
-            element.update()
-        while True:
-            key = getch()
-            if key == b'\x00':
-                key = _keys[key + getch()]
-            elif key == b'\xe0':
-                key = _keys[key + getch()]
-            else:
-                key = _keys[key]
-            try:
-                key_mapped_func = self._keys[key]
-            except KeyError:
-                key_default_func = self._keys['default']
-                key_default_func.__call__(key)
-                continue
-            try:
-                key_mapped_func.__call__()
-            except AttributeError:
-                if key_mapped_func is None:
+            element.redraw()
+        self.current.select()
+        try:
+            for key in _key_presses():
+                key_mapped_func = self._keys.get(key, _unmapped)
+                if key_mapped_func is _unmapped:
+                    self._keys['default'](key)
+                elif key_mapped_func is None:
                     if clear_on_exit or self.clear_on_exit:
                         self.clear()
                     return self.result()
-                raise
+                else:
+                    key_mapped_func()
+        finally:
+            flush_frame()
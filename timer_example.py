@@ -1,11 +1,7 @@
-import colorama
 from time import time, sleep
 from contextlib import suppress
 
-from terribleconsolegui import Layout, GUIElement, GUICounter, print_pos, PopGUISection
-
-
-colorama.init()
+from terribleconsolegui import Layout, GUIElement, GUICounter, print_pos, flush_frame, PopGUISection
 
 
 class TypeSelection(Layout):
@@ -67,6 +63,7 @@ def main():
             total = TimeSelection(line=4).run_loop()
             break
     print_pos(f'Thats {total} seconds, with a {type_}', 1, 6)
+    flush_frame()
     # Implementing the actual timer is left as an exercise for the reader (or until I feel like doing it).
 
 